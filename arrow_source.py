@@ -0,0 +1,20 @@
+# arrow_source.py
+import arrow_odbc
+from config import CONNECTION_STRING
+
+# Kept out of db.py so only the jobs that extract through arrow-odbc (products and orders)
+# load pyarrow and the arrow-odbc native library; etl_category stays on plain pyodbc.
+
+# Let the ODBC driver manager pool arrow-odbc's connection handles as well.
+# arrow-odbc keeps its own ODBC environment, so this has to be set before its first read.
+arrow_odbc.enable_odbc_connection_pooling()
+
+def read_source_batches(sql_query, batch_size):
+    # arrow-odbc bulk-fetches the result set straight into columnar Arrow buffers,
+    # so no Python object is created per cell before pandas takes the columns over.
+    # It opens its own connection to the source DB (not the shared pyodbc one in db.py).
+    return arrow_odbc.read_arrow_batches_from_odbc(
+        query=sql_query,
+        connection_string=CONNECTION_STRING,
+        batch_size=batch_size,
+    )
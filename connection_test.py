@@ -2,27 +2,39 @@
 import pyodbc
 from config import CONNECTION_STRING, SERVER_NAME, SOURCE_DATABASE
 
-print(f"Attempting to connect to: {SERVER_NAME} / {SOURCE_DATABASE}...")
-
-try:
-    # Use pyodbc.connect with the defined connection string
-    cnxn = pyodbc.connect(CONNECTION_STRING)
-    cursor = cnxn.cursor()
-
-    # Execute a simple query to confirm data can be fetched
-    cursor.execute("SELECT COUNT(*) FROM Customers")
-    count = cursor.fetchone()[0]
-
-    print("✅ Connection successful!")
-    print(f"Total rows in Customers table: {count}")
-
-    # Close the connection immediately after the test
-    cursor.close()
-    cnxn.close()
-    print("Connection closed.")
-
-except pyodbc.Error as ex:
-    # Print the specific ODBC error
-    sqlstate = ex.args[0]
-    print(f"❌ Connection failed! ODBC Error: {sqlstate}")
-    print("Possible causes: Incorrect Server Name, missing or wrong ODBC Driver, or firewall.")
+# Connection pooling is enabled in db.py (pyodbc.pooling), which the ETL scripts import
+# before the health check runs. The pool only lives inside the current Python process:
+# when the ETL job later opens a pyodbc connection with the same CONNECTION_STRING
+# (etl_category's get_source_connection()), it reuses the handle closed here.
+
+def healthcheck():
+    print(f"Attempting to connect to: {SERVER_NAME} / {SOURCE_DATABASE}...")
+
+    try:
+        # Use pyodbc.connect with the defined connection string
+        cnxn = pyodbc.connect(CONNECTION_STRING)
+        cursor = cnxn.cursor()
+
+        # Execute a simple query to confirm data can be fetched
+        cursor.execute("SELECT COUNT(*) FROM Customers")
+        count = cursor.fetchone()[0]
+
+        print("✅ Connection successful!")
+        print(f"Total rows in Customers table: {count}")
+
+        # Close the connection immediately after the test (returned to the pool if db.py enabled it)
+        cursor.close()
+        cnxn.close()
+        print("Connection closed.")
+        return True
+
+    except pyodbc.Error as ex:
+        # Print the specific ODBC error
+        sqlstate = ex.args[0]
+        print(f"❌ Connection failed! ODBC Error: {sqlstate}")
+        print("Possible causes: Incorrect Server Name, missing or wrong ODBC Driver, or firewall.")
+        return False
+
+
+if __name__ == '__main__':
+    healthcheck()
\ No newline at end of file
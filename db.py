@@ -0,0 +1,61 @@
+# db.py
+import atexit
+import threading
+import pyodbc
+from config import CONNECTION_STRING, REPORTING_CONNECTION_STRING
+
+# Let the ODBC driver manager pool connection handles.
+# This only takes effect if it is set before the first pyodbc.connect() call.
+pyodbc.pooling = True
+
+# One open connection per connection string and thread, shared by every extract/load
+# step that thread runs instead of reconnecting (TCP + login) inside each function.
+# pyodbc connections must not be shared between threads, so parallel ETL jobs each get
+# their own; all of them are tracked so they can be closed together at exit.
+_local = threading.local()
+_open_connections = []
+_lock = threading.Lock()
+
+def _get_connection(connection_string):
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    cnxn = connections.get(connection_string)
+    if cnxn is None:
+        # autocommit=False: each load's clear + insert + commit() runs as one transaction
+        cnxn = pyodbc.connect(connection_string, autocommit=False)
+        # Session settings for every batch on this connection: no row-count messages sent
+        # back over TDS per statement, and any runtime error rolls back the whole transaction
+        cnxn.execute("SET NOCOUNT ON; SET XACT_ABORT ON;")
+        connections[connection_string] = cnxn
+        with _lock:
+            _open_connections.append(cnxn)
+    return cnxn
+
+def get_source_connection():
+    return _get_connection(CONNECTION_STRING)
+
+def get_reporting_connection():
+    return _get_connection(REPORTING_CONNECTION_STRING)
+
+def close_connections():
+    with _lock:
+        for cnxn in _open_connections:
+            cnxn.close()
+        _open_connections.clear()
+
+def to_param_rows(df):
+    # Build executemany/TVP parameter rows column by column: each column is unboxed to
+    # Python values on its own (tolist), so the frame is never upcast to one object array.
+    # Missing values (NaN / NaT / pd.NA) are sent as NULL.
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        values = series.tolist()
+        if series.hasnans:
+            values = [None if missing else value for value, missing in zip(values, series.isna())]
+        columns.append(values)
+    return list(zip(*columns))
+
+# Close the shared connections once, when the ETL run exits
+atexit.register(close_connections)
@@ -1,51 +1,51 @@
 # etl_category.py
 import pyodbc
-import pandas as pd
-from config import CONNECTION_STRING, REPORTING_CONNECTION_STRING
+from connection_test import healthcheck
+from db import get_source_connection, get_reporting_connection
+
+# Dim_Category is only a handful of rows, so the raw cursor rowset is passed
+# straight from the source to the target without a pandas DataFrame in between.
 
 # --- 1. EXTRACT ---
 def extract_categories():
     print("1. Extracting data from NORTHWND.Categories...")
     try:
-        cnxn = pyodbc.connect(CONNECTION_STRING)
-        # Select the columns needed for the dimension table
-        sql_query = "SELECT CategoryID, CategoryName, Description FROM Categories"
-        df = pd.read_sql(sql_query, cnxn)
-        cnxn.close()
-        print(f"   Extracted {len(df)} rows.")
-        return df
+        cnxn = get_source_connection()
+        cursor = cnxn.cursor()
+        # Select the columns needed for the dimension table, already named and ordered like Dim_Category
+        sql_query = """
+        SELECT
+            CategoryID AS Source_CategoryID,
+            CategoryName,
+            Description AS CategoryDescription
+        FROM Categories
+        """
+        cursor.execute(sql_query)
+        rows = cursor.fetchall()
+        cursor.close()
+        print(f"   Extracted {len(rows)} rows.")
+        return rows
 
     except pyodbc.Error as ex:
         print(f"Extraction failed: {ex}")
-        return pd.DataFrame()
-
-# --- 2. TRANSFORM ---
-def transform_data(df):
-    print("2. Transformation (Renaming and Cleaning)...")
-    # Rename columns to match the Dim_Category table structure
-    df.rename(columns={'CategoryID': 'Source_CategoryID',
-                       'Description': 'CategoryDescription'},
-              inplace=True)
+        return []
 
-    # Ensure all necessary columns exist (Source_CategoryID, CategoryName, CategoryDescription)
-    df = df[['Source_CategoryID', 'CategoryName', 'CategoryDescription']]
-    
-    print("   Data transformed successfully.")
-    return df
-
-# --- 3. LOAD ---
-def load_dimension_table(df):
-    if df.empty:
+# --- 2. LOAD ---
+def load_dimension_table(rows):
+    if not rows:
         print("   No data to load. Skipping Load phase.")
-        return
+        return False
 
     # IMPORTANT: Target table is Dim_Category
     TARGET_TABLE = "Dim_Category" 
 
-    print(f"3. Loading data into Northwind_Reporting_DB.{TARGET_TABLE}...")
+    print(f"2. Loading data into Northwind_Reporting_DB.{TARGET_TABLE}...")
     try:
-        cnxn = pyodbc.connect(REPORTING_CONNECTION_STRING)
+        cnxn = get_reporting_connection()
         cursor = cnxn.cursor()
+        # Bind parameters as arrays so executemany sends the rows in bulk
+        # instead of one round-trip per row
+        cursor.fast_executemany = True
 
         # Simple Load Strategy: Truncate and Reload (for dimensions that change slowly)
         cursor.execute(f"TRUNCATE TABLE {TARGET_TABLE}")
@@ -54,24 +54,36 @@ def load_dimension_table(df):
         # Prepare the INSERT statement matching the Dim_Category columns
         insert_sql = f"INSERT INTO {TARGET_TABLE} (Source_CategoryID, CategoryName, CategoryDescription) VALUES (?, ?, ?)"
 
-        # Prepare data for fast insertion
-        data_to_insert = [tuple(row) for row in df.values]
-        
-        # Use executemany for efficiency
-        cursor.executemany(insert_sql, data_to_insert)
+        # Declare the target column types up front so pyodbc can preallocate
+        # the parameter arrays without scanning the data
+        cursor.setinputsizes([
+            (pyodbc.SQL_INTEGER, 0, 0),           # Source_CategoryID INT
+            (pyodbc.SQL_WVARCHAR, 15, 0),         # CategoryName NVARCHAR(15)
+            (pyodbc.SQL_WLONGVARCHAR, 0, 0),      # CategoryDescription NTEXT
+        ])
+        # Use executemany for efficiency; the extracted rows are already in column order
+        cursor.executemany(insert_sql, rows)
         
         cnxn.commit()
         cursor.close()
-        cnxn.close()
 
-        print(f"   ✅ Successfully loaded {len(df)} rows into {TARGET_TABLE}.")
+        print(f"   ✅ Successfully loaded {len(rows)} rows into {TARGET_TABLE}.")
+        return True
 
     except pyodbc.Error as ex:
         print(f"Loading failed: {ex}")
         cnxn.rollback()
+        return False
+
+
+def main():
+    # Returns True if Dim_Category was reloaded
+    category_rows = extract_categories()
+    return load_dimension_table(category_rows)
 
 
 if __name__ == '__main__':
-    categories_df = extract_categories()
-    transformed_df = transform_data(categories_df)
-    load_dimension_table(transformed_df)
\ No newline at end of file
+    # Check the server is reachable before running the ETL; the pooled handle is then
+    # reused by get_source_connection() for the extract
+    if healthcheck():
+        main()
\ No newline at end of file
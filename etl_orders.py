@@ -1,143 +1,139 @@
 # etl_orders.py
+import itertools
+import arrow_odbc
 import pyodbc
-import pandas as pd
-from config import CONNECTION_STRING, REPORTING_CONNECTION_STRING
+from arrow_source import read_source_batches
+from config import REPORTING_DATABASE
+from connection_test import healthcheck
+from db import get_reporting_connection, to_param_rows
+
+# Rows per chunk streamed through extract -> transform -> load
+CHUNK_SIZE = 50_000
 
 # --- 1. EXTRACT ---
 def extract_order_data():
     print("1. Extracting data from NORTHWND (Orders and Order Details)...")
     try:
-        cnxn = pyodbc.connect(CONNECTION_STRING)
-        # SQL to join Orders and Order Details and select required fields
-        sql_query = """
+        # SQL Server joins Orders and Order Details, resolves ProductKey against
+        # Dim_Product (three-part name into the reporting DB, seeked through the
+        # UNIQUE index on Source_ProductID) and calculates ExtendedPrice, so the
+        # rows arrive already shaped like Fact_OrderMetrics
+        sql_query = f"""
         SELECT
-            OD.OrderID, 
-            OD.ProductID,
+            OD.OrderID AS Source_OrderID,
+            OD.ProductID AS Source_ProductID,
+            DP.ProductKey,
             O.OrderDate,
             O.RequiredDate,
             O.ShippedDate,
             OD.Quantity,
             OD.Discount,
-            OD.UnitPrice -- Keep source UnitPrice for calculation
+            OD.Quantity * CAST(OD.UnitPrice AS FLOAT) * (1 - CAST(OD.Discount AS FLOAT)) AS ExtendedPrice
         FROM [Order Details] OD
         JOIN Orders O ON OD.OrderID = O.OrderID
+        LEFT JOIN {REPORTING_DATABASE}.dbo.Dim_Product DP ON DP.Source_ProductID = OD.ProductID
         """
-        df = pd.read_sql(sql_query, cnxn)
-        cnxn.close()
-        print(f"   Extracted {len(df)} order detail rows.")
-        return df
+        reader = read_source_batches(sql_query, batch_size=CHUNK_SIZE)
+        # Yield one batch at a time so only a single chunk is held in memory.
+        # The batches are consumed inside the load step, which reports the row total.
+        for batch in reader:
+            yield batch.to_pandas()
 
-    except pyodbc.Error as ex:
+    except arrow_odbc.Error as ex:
         print(f"Extraction failed: {ex}")
-        return pd.DataFrame()
+        raise
 
-# --- 2. TRANSFORMATION (Lookups and Calculation) ---
+# --- 2. TRANSFORMATION ---
 def transform_fact_data(fact_df):
-    print("2. Transformation: Calculating ExtendedPrice and performing Key Lookups...")
+    if fact_df.empty:
+        return fact_df
 
-    # A. Calculate the ExtendedPrice metric
-    fact_df['ExtendedPrice'] = fact_df['Quantity'] * fact_df['UnitPrice'] * (1 - fact_df['Discount'])
-    
-    # Drop the temporary calculation column
-    fact_df.drop('UnitPrice', axis=1, inplace=True)
-    
-    # B. Load the Product Dimension Map for Lookup
-    print("   Loading Product Key mapping for lookup...")
-    try:
-        cnxn = pyodbc.connect(REPORTING_CONNECTION_STRING)
-        product_map_query = "SELECT ProductKey, Source_ProductID FROM Dim_Product"
-        product_map_df = pd.read_sql(product_map_query, cnxn)
-        cnxn.close()
-    except pyodbc.Error as ex:
-        print(f"   Failed to load dimension map: {ex}")
-        return pd.DataFrame()
-
-    # C. Perform the Lookup (Merge)
-    # Join the Fact data (fact_df) with the Dimension Map (product_map_df) on the shared natural key
-    transformed_df = pd.merge(
-        fact_df, 
-        product_map_df, 
-        left_on='ProductID', 
-        right_on='Source_ProductID', 
-        how='left' 
-    )
-    
-    # D. Final Clean-up and Renaming
-    
-    # CRITICAL FIX 1: Drop the redundant Source_ProductID column added by the merge 
-    # (since the join columns had different names, no _x/_y suffixes were added)
-    transformed_df.drop('Source_ProductID', axis=1, inplace=True)
-    
-    # CRITICAL FIX 2: Rename the original source IDs to the final names
-    transformed_df.rename(columns={
-        'ProductID': 'Source_ProductID', # Rename original source ID
-        'OrderID': 'Source_OrderID',
-    }, inplace=True)
-    
+    # ExtendedPrice and the ProductKey lookup are already resolved by the extract query.
     # Select and reorder columns to match the Fact_OrderMetrics table (ensuring only 9 columns)
     final_cols = [
         'Source_OrderID', 'Source_ProductID', 'ProductKey', 
         'OrderDate', 'RequiredDate', 'ShippedDate', 
         'Quantity', 'Discount', 'ExtendedPrice'
     ]
-    transformed_df = transformed_df[final_cols]
-    
-    # Final check: Must have exactly 9 columns
-    print(f"   Data transformed. Final column count: {len(transformed_df.columns)}") 
+    transformed_df = fact_df[final_cols]
 
-    print("   Data transformed and keys looked up successfully.")
+    # arrow-odbc already delivers the other columns as INT/SMALLINT/REAL-sized dtypes. Only the
+    # LEFT JOINed ProductKey arrives as float64 (its NULLs become NaN), so convert it back to a
+    # nullable integer; products missing from Dim_Product still load as NULL.
+    transformed_df = transformed_df.astype({'ProductKey': 'Int32'})
+    
     return transformed_df
 
-# --- 3. LOAD ---
-def load_fact_table(df):
-    if df.empty:
-        print("   No data to load. Skipping Load phase.")
-        return
+def transform_fact_chunks(chunks):
+    # Print the stage header once, after the first chunk has been extracted, not once per chunk
+    for i, fact_df in enumerate(chunks):
+        if i == 0:
+            print("2. Transformation: Preparing fact rows for load...")
+        yield transform_fact_data(fact_df)
 
+# --- 3. LOAD ---
+# Loads Fact_OrderMetrics as one Table-Valued Parameter (TVP) per chunk through
+# dbo.usp_LoadFactOrderMetrics (created once in SSMS by setup_load_procs.sql)
+def load_fact_table(chunks):
+    chunks = iter(chunks)
     TARGET_TABLE = "Fact_OrderMetrics" 
 
-    print(f"3. Loading data into Northwind_Reporting_DB.{TARGET_TABLE}...")
     try:
-        cnxn = pyodbc.connect(REPORTING_CONNECTION_STRING)
+        cnxn = get_reporting_connection()
         cursor = cnxn.cursor()
 
-        # Clear the Fact table
-        cursor.execute(f"DELETE FROM {TARGET_TABLE}")
-        print(f"   Table {TARGET_TABLE} cleared using DELETE.")
-        
-        # Prepare the INSERT statement matching the Fact_OrderMetrics columns (9 columns)
-        insert_sql = f"""
-        INSERT INTO {TARGET_TABLE} (
-            Source_OrderID, Source_ProductID, ProductKey, 
-            OrderDate, RequiredDate, ShippedDate, 
-            Quantity, Discount, ExtendedPrice
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-
-        # Prepare data for fast insertion:
-        # CRITICAL FIX: Use .to_numpy() to get the underlying array without the index, 
-        # then convert to a list of tuples.
-        data_to_insert = [tuple(row) for row in df.to_numpy()] # <-- CHANGE IS HERE
-        
-        # Check to confirm the number of columns matches before execution (Optional, but good diagnostic)
-        if data_to_insert and len(data_to_insert[0]) != 9:
-             raise ValueError(f"Data row has {len(data_to_insert[0])} columns, but SQL expects 9.")
-
-        cursor.executemany(insert_sql, data_to_insert)
+        # Pull the first chunk before touching the table, so an empty extract leaves it as is
+        # (this also runs the extract and transform steps for it, so their messages come first)
+        first_chunk = next(chunks, None)
+        print(f"3. Loading data into Northwind_Reporting_DB.{TARGET_TABLE}...")
+        if first_chunk is None:
+            print("   No data to load. Skipping Load phase.")
+            return False
+
+        rows_loaded = 0
+        for i, df in enumerate(itertools.chain([first_chunk], chunks)):
+            # Check to confirm the number of columns matches before execution (Optional, but good diagnostic)
+            if len(df.columns) != 9:
+                 raise ValueError(f"Data has {len(df.columns)} columns, but the load expects 9.")
+
+            # Prepare the rowset column by column; missing keys/dates are sent as NULL
+            data_to_insert = to_param_rows(df)
+
+            # Send the whole chunk as a single TVP into one set-based INSERT ... SELECT.
+            # The procedure TRUNCATEs the Fact table (no table references it) before the first chunk only.
+            truncate = i == 0
+            cursor.execute("{CALL dbo.usp_LoadFactOrderMetrics (?, ?)}", (data_to_insert, truncate))
+            if truncate:
+                print(f"   Table {TARGET_TABLE} cleared using TRUNCATE.")
+            rows_loaded += len(df)
         
         cnxn.commit()
         cursor.close()
-        cnxn.close()
 
-        print(f"   ✅ Successfully loaded {len(df)} rows into {TARGET_TABLE}.")
+        print(f"   ✅ Successfully loaded {rows_loaded} rows into {TARGET_TABLE}.")
+        return True
 
+    except arrow_odbc.Error:
+        # Extraction failed part-way through the stream (already reported); keep the old data
+        cnxn.rollback()
+        return False
     except pyodbc.Error as ex:
         # Added pyodbc.Error check to capture the specific error
         print(f"Loading failed: {ex}")
         cnxn.rollback()
+        return False
+
+
+def main():
+    # Stream chunk by chunk: each extracted chunk is transformed and loaded
+    # before the next one is fetched, so memory is bounded by CHUNK_SIZE.
+    # Returns True if Fact_OrderMetrics was reloaded
+    order_fact_chunks = extract_order_data()
+    transformed_fact_chunks = transform_fact_chunks(order_fact_chunks)
+    return load_fact_table(transformed_fact_chunks)
 
 
 if __name__ == '__main__':
-    order_fact_df = extract_order_data()
-    transformed_fact_df = transform_fact_data(order_fact_df)
-    load_fact_table(transformed_fact_df)
\ No newline at end of file
+    # Check the server is reachable before running the ETL
+    if healthcheck():
+        main()
\ No newline at end of file
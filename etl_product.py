@@ -1,111 +1,87 @@
 # etl_product.py
+import arrow_odbc
 import pyodbc
 import pandas as pd
-from config import CONNECTION_STRING, REPORTING_CONNECTION_STRING
+from arrow_source import read_source_batches
+from connection_test import healthcheck
+from db import get_reporting_connection, to_param_rows
 
 # --- 1. EXTRACT ---
 def extract_products():
     print("1. Extracting data from NORTHWND.Products...")
     try:
-        cnxn = pyodbc.connect(CONNECTION_STRING)
-        # We select all relevant columns from the source Products table
+        # We select all relevant columns from the source Products table, already named and
+        # ordered like Dim_Product. The types arrive ready to load (INT columns as integers,
+        # UnitPrice cast from MONEY to FLOAT so it is float64 rather than Decimal objects),
+        # so no separate transform step is needed.
         sql_query = """
         SELECT 
-            ProductID, 
+            ProductID AS Source_ProductID, 
             ProductName, 
-            SupplierID,
-            CategoryID, 
+            SupplierID AS Source_SupplierID,
+            CategoryID AS Source_CategoryID, 
             QuantityPerUnit,
-            UnitPrice,
+            CAST(UnitPrice AS FLOAT) AS UnitPrice,
             UnitsInStock,
             Discontinued
         FROM Products
         """
-        df = pd.read_sql(sql_query, cnxn)
-        cnxn.close()
+        reader = read_source_batches(sql_query, batch_size=50_000)
+        df = reader.into_pyarrow_record_batch_reader().read_pandas()
         print(f"   Extracted {len(df)} rows.")
         return df
 
-    except pyodbc.Error as ex:
+    except arrow_odbc.Error as ex:
         print(f"Extraction failed: {ex}")
         return pd.DataFrame()
 
-# --- 2. TRANSFORM ---
-def transform_data(df):
-    print("2. Transformation (Renaming and Cleaning)...")
-    
-    # Rename columns to match the Dim_Product table structure and convention
-    df.rename(columns={
-        'ProductID': 'Source_ProductID',
-        'SupplierID': 'Source_SupplierID',
-        'CategoryID': 'Source_CategoryID'
-    }, inplace=True)
-
-    # Simple data type correction/cleaning (Good practice, even if MSSQL is usually good with these)
-    df['Source_ProductID'] = pd.to_numeric(df['Source_ProductID'], errors='coerce').astype('Int64')
-    df['UnitPrice'] = pd.to_numeric(df['UnitPrice'], errors='coerce')
-
-    # Reorder columns to match the Dim_Product table structure for insertion
-    df = df[[
-        'Source_ProductID', 
-        'ProductName', 
-        'Source_SupplierID', 
-        'Source_CategoryID', 
-        'QuantityPerUnit',
-        'UnitPrice',
-        'UnitsInStock',
-        'Discontinued'
-    ]]
-    
-    print("   Data transformed successfully.")
-    return df
-
-# --- 3. LOAD ---
+# --- 2. LOAD ---
 def load_dimension_table(df):
     if df.empty:
         print("   No data to load. Skipping Load phase.")
-        return
+        return False
 
     TARGET_TABLE = "Dim_Product" 
     REFERENCING_TABLE = "Fact_OrderMetrics" # Table that has a foreign key to Dim_Product
 
-    print(f"3. Loading data into Northwind_Reporting_DB.{TARGET_TABLE}...")
+    print(f"2. Loading data into Northwind_Reporting_DB.{TARGET_TABLE}...")
     try:
-        cnxn = pyodbc.connect(REPORTING_CONNECTION_STRING)
+        cnxn = get_reporting_connection()
         cursor = cnxn.cursor()
 
-    # Simple Load Strategy: DELETE and Reload
-        # DELETE bypasses the Foreign Key TRUNCATE restriction.
-        cursor.execute(f"DELETE FROM {TARGET_TABLE}")
-        print(f"   Table {TARGET_TABLE} cleared using DELETE.")
-        
-        # Prepare the INSERT statement matching the Dim_Product columns (8 columns)
-        insert_sql = f"""
-        INSERT INTO {TARGET_TABLE} (
-            Source_ProductID, ProductName, Source_SupplierID, Source_CategoryID, 
-            QuantityPerUnit, UnitPrice, UnitsInStock, Discontinued
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        # Clear the Fact rows that reference Dim_Product first, in the same transaction,
+        # so the DELETE below never hits the Foreign Key. etl_orders reloads them next.
+        cursor.execute(f"TRUNCATE TABLE {REFERENCING_TABLE}")
+        print(f"   Table {REFERENCING_TABLE} cleared using TRUNCATE (reloaded by etl_orders).")
 
-        # Prepare data for fast insertion (converting DataFrame rows to list of tuples)
-        # Note: We use the .values and list/tuple conversion for speed with executemany
-        data_to_insert = [tuple(row) for row in df.values]
-        
-        # Use executemany for efficient batch insertion
-        cursor.executemany(insert_sql, data_to_insert)
+        # Prepare the rowset column by column, in Dim_Product column order (8 columns)
+        data_to_insert = to_param_rows(df)
+
+        # Send all rows as a single TVP into one set-based INSERT ... SELECT.
+        # The procedure clears the table with DELETE first, which bypasses the
+        # Foreign Key TRUNCATE restriction (created once in SSMS by setup_load_procs.sql).
+        cursor.execute("{CALL dbo.usp_LoadDimProduct (?)}", (data_to_insert,))
+        print(f"   Table {TARGET_TABLE} cleared using DELETE.")
         
         cnxn.commit()
         cursor.close()
-        cnxn.close()
 
         print(f"   ✅ Successfully loaded {len(df)} rows into {TARGET_TABLE}.")
+        return True
 
     except pyodbc.Error as ex:
         print(f"Loading failed: {ex}")
         cnxn.rollback()
+        return False
 
 
-if __name__ == '__main__':
+def main():
+    # Returns True if Dim_Product was reloaded
     products_df = extract_products()
-    transformed_df = transform_data(products_df)
-    load_dimension_table(transformed_df)
\ No newline at end of file
+    return load_dimension_table(products_df)
+
+
+if __name__ == '__main__':
+    # Check the server is reachable before running the ETL
+    if healthcheck():
+        main()
\ No newline at end of file
@@ -0,0 +1,40 @@
+# run_all.py
+from concurrent.futures import ThreadPoolExecutor
+import etl_category
+import etl_orders
+import etl_product
+from connection_test import healthcheck
+
+def run_all():
+    # Threads rather than processes: the jobs spend their time waiting on SQL Server,
+    # and pyodbc / arrow-odbc release the GIL during ODBC calls.
+    # Each thread gets its own connections from db.py.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Dim_Category and Dim_Product are independent, so load them side by side
+        category_future = executor.submit(etl_category.main)
+        product_future = executor.submit(etl_product.main)
+
+        # Fact_OrderMetrics looks up ProductKey in Dim_Product, so it has to wait for the product load
+        # and is skipped if that failed (its ProductKeys would resolve against stale or missing rows).
+        # The product load empties Fact_OrderMetrics before reloading Dim_Product, so re-runs
+        # don't hit the Foreign Key; a failed product load rolls back and leaves both tables as they were.
+        product_ok = product_future.result()
+        if product_ok:
+            orders_ok = executor.submit(etl_orders.main).result()
+        else:
+            print("Skipping Fact_OrderMetrics: the Dim_Product load failed.")
+            orders_ok = False
+
+        category_ok = category_future.result()
+
+    print(f"Dim_Category: {'OK' if category_ok else 'FAILED'}")
+    print(f"Dim_Product: {'OK' if product_ok else 'FAILED'}")
+    print(f"Fact_OrderMetrics: {'OK' if orders_ok else 'FAILED'}")
+    return category_ok and product_ok and orders_ok
+
+
+if __name__ == '__main__':
+    # Check the server is reachable before running the ETL jobs; the pooled handle is then
+    # reused by etl_category's source connection (the other jobs extract through arrow-odbc)
+    if healthcheck():
+        run_all()
\ No newline at end of file
@@ -0,0 +1,83 @@
+-- setup_load_procs.sql
+-- One-time setup for etl_product.py and etl_orders.py: run in SSMS against
+-- Northwind_Reporting_DB after Dim_Product and Fact_OrderMetrics have been created,
+-- and again whenever a table type changes. Both scripts load their rows as one
+-- Table-Valued Parameter (TVP) through these procedures and do not create them themselves.
+USE Northwind_Reporting_DB;
+GO
+
+-- A table type cannot be altered, and cannot be dropped while a procedure uses it,
+-- so drop the procedure first, then recreate the type and the procedure.
+DROP PROCEDURE IF EXISTS dbo.usp_LoadDimProduct;
+DROP TYPE IF EXISTS dbo.DimProductTVP;
+DROP PROCEDURE IF EXISTS dbo.usp_LoadFactOrderMetrics;
+DROP TYPE IF EXISTS dbo.FactOrderMetricsTVP;
+GO
+
+CREATE TYPE dbo.DimProductTVP AS TABLE (
+    Source_ProductID INT,
+    ProductName NVARCHAR(40),
+    Source_SupplierID INT,
+    Source_CategoryID INT,
+    QuantityPerUnit NVARCHAR(20),
+    UnitPrice MONEY,
+    UnitsInStock SMALLINT,
+    Discontinued BIT
+);
+GO
+
+CREATE PROCEDURE dbo.usp_LoadDimProduct
+    @rows dbo.DimProductTVP READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- DELETE rather than TRUNCATE: Fact_OrderMetrics has a Foreign Key to Dim_Product
+    DELETE FROM dbo.Dim_Product;
+
+    INSERT INTO dbo.Dim_Product WITH (TABLOCK) (
+        Source_ProductID, ProductName, Source_SupplierID, Source_CategoryID,
+        QuantityPerUnit, UnitPrice, UnitsInStock, Discontinued
+    )
+    SELECT
+        Source_ProductID, ProductName, Source_SupplierID, Source_CategoryID,
+        QuantityPerUnit, UnitPrice, UnitsInStock, Discontinued
+    FROM @rows;
+END
+GO
+
+CREATE TYPE dbo.FactOrderMetricsTVP AS TABLE (
+    Source_OrderID INT,
+    Source_ProductID INT,
+    ProductKey INT,
+    OrderDate DATETIME,
+    RequiredDate DATETIME,
+    ShippedDate DATETIME,
+    Quantity SMALLINT,
+    Discount REAL,
+    ExtendedPrice MONEY
+);
+GO
+
+CREATE PROCEDURE dbo.usp_LoadFactOrderMetrics
+    @rows dbo.FactOrderMetricsTVP READONLY,
+    @truncate BIT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @truncate = 1
+        TRUNCATE TABLE dbo.Fact_OrderMetrics;
+
+    INSERT INTO dbo.Fact_OrderMetrics WITH (TABLOCK) (
+        Source_OrderID, Source_ProductID, ProductKey,
+        OrderDate, RequiredDate, ShippedDate,
+        Quantity, Discount, ExtendedPrice
+    )
+    SELECT
+        Source_OrderID, Source_ProductID, ProductKey,
+        OrderDate, RequiredDate, ShippedDate,
+        Quantity, Discount, ExtendedPrice
+    FROM @rows;
+END
+GO